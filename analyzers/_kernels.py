@@ -0,0 +1,44 @@
+# analyzers/_kernels.py
+import math
+from numba import njit
+
+
+@njit(cache=True)
+def pitch_stats(f0):
+    """Statistiche del pitch (media, dev. standard, jitter) in un solo passaggio.
+
+    Fonde le riduzioni nanmean/nanstd/diff sulla traccia f0 usando
+    l'algoritmo di Welford: un unico loop senza array temporanei, con i
+    frame NaN (non vocalizzati) saltati in corsa.
+    """
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    prev = 0.0
+    d_n = 0
+    d_mean = 0.0
+    d_m2 = 0.0
+    for i in range(f0.shape[0]):
+        x = f0[i]
+        if math.isnan(x):
+            continue
+        n += 1
+        delta = x - mean
+        mean += delta / n
+        m2 += delta * (x - mean)
+        if n > 1:
+            d = x - prev
+            d_n += 1
+            d_delta = d - d_mean
+            d_mean += d_delta / d_n
+            d_m2 += d_delta * (d - d_mean)
+        prev = x
+
+    if n == 0:
+        return 0.0, 0.0, 0.0
+
+    std = math.sqrt(m2 / n)
+    jitter = 0.0
+    if d_n > 0 and mean > 0:
+        jitter = math.sqrt(d_m2 / d_n) / mean
+    return mean, std, jitter
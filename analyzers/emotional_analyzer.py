@@ -7,77 +7,91 @@ from pathlib import Path
 import json
 from scipy.stats import zscore
 from config.emotional_params import EMOTIONAL_PARAMETERS, REFERENCE_TEXTS
+from analyzers.features import compute_features
+from analyzers._kernels import pitch_stats
+
+# Soglie delle catene if/elif compilate in LUT ordinate: np.searchsorted
+# mappa il valore al bin senza rami Python. Gli estremi ricalcano le fasce
+# dichiarate in config/emotional_params.py.
+_RATE_EDGES = np.array([130.0, 170.0])
+_RATE_LABELS = ('slow', 'normal', 'fast')
+_PITCH_EDGES = np.array([20.0, 50.0])
+_PITCH_LABELS = ('monotone', 'moderate', 'high')
+_ENERGY_EDGES = np.array([0.05, 0.1])
+_ENERGY_LABELS = ('low', 'medium', 'high')
+
 
 class EmotionalAnalyzer:
+    # Ordine fisso delle emozioni: gli score vivono in un array indicizzato
+    # su queste etichette e il dict è costruito solo per l'output
+    LABELS = ('gioia', 'tristezza', 'rabbia', 'ansia', 'neutrale')
+
     def __init__(self):
         self.params = EMOTIONAL_PARAMETERS
         self.reference_texts = REFERENCE_TEXTS
-        
-    def analyze_emotions(self, audio_data: np.ndarray, sr: int, text_type: str = None) -> Dict:
+
+    def analyze_emotions(self, audio_data: np.ndarray, sr: int, text_type: str = None,
+                         feats: Dict = None) -> Dict:
         """Analisi semplificata dello stato emotivo dalla voce"""
         try:
-            # Ensure audio is 1D float32
-            audio_data = np.asarray(audio_data, dtype=np.float32)
-            if len(audio_data.shape) > 1:
-                audio_data = np.mean(audio_data, axis=1)
-            
+            # Riusa le feature precalcolate se disponibili
+            if feats is None:
+                feats = compute_features(audio_data, sr)
+            audio_data = feats['audio']
+            sr = feats['sr']
+
             # Basic checks
             if len(audio_data) < sr * 0.5:  # Minimum 0.5 seconds
                 return self._get_default_results()
-                
+
             # Extract energy features
-            S = np.abs(librosa.stft(audio_data))
-            rms = librosa.feature.rms(S=S)[0]
+            rms = feats['rms']
             energy = float(np.mean(rms))  # Convert to Python scalar
+
+            # Calculate tempo (solo la stima, senza il beat tracker DP:
+            # qui le posizioni dei beat non servono)
+            onset_env = feats['onset_env']
+            # hop_length deve combaciare con quello dell'onset envelope
+            # condiviso, altrimenti il tempo viene letto a metà frame rate
+            tempo = float(librosa.beat.tempo(onset_envelope=onset_env, sr=sr,
+                                             hop_length=feats['hop_length'])[0])
+
+            # Calculate pitch features safely (kernel fuso sulla traccia YIN)
+            pitch_mean, pitch_std, _ = pitch_stats(feats['f0'])
+            pitch_mean = float(pitch_mean)
+            pitch_std = float(pitch_std)
             
-            # Calculate tempo
-            onset_env = librosa.onset.onset_strength(y=audio_data, sr=sr)
-            tempo, _ = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr)
-            tempo = float(tempo)  # Convert to Python scalar
-            
-            # Calculate pitch features safely
-            pitches, magnitudes = librosa.piptrack(y=audio_data, sr=sr)
-            pitch_values = pitches[magnitudes > np.max(magnitudes) * 0.1]
-            if len(pitch_values) > 0:
-                pitch_mean = float(np.mean(pitch_values))
-                pitch_std = float(np.std(pitch_values))
-            else:
-                pitch_mean = 0.0
-                pitch_std = 0.0
-            
-            # Prepare emotion scores
-            emotion_scores = {
-                'gioia': 0.0,
-                'tristezza': 0.0,
-                'rabbia': 0.0,
-                'ansia': 0.0,
-                'neutrale': 0.2
-            }
-            
-            # Simple rule-based scoring with explicit float conversions
+            # Prepare emotion scores (array a ordine fisso, indici da LABELS)
+            scores = np.zeros(len(self.LABELS), dtype=np.float32)
+            scores[4] = 0.2  # neutrale
+
+            # Simple rule-based scoring
             if energy > 0.1:
-                emotion_scores['gioia'] = float(energy)
-                emotion_scores['rabbia'] = float(energy * 0.5)
+                scores[0] = energy          # gioia
+                scores[2] = energy * 0.5    # rabbia
             else:
-                emotion_scores['tristezza'] = float(0.1 - energy)
-                
+                scores[1] = 0.1 - energy    # tristezza
+
             if pitch_std > 0:
-                emotion_scores['gioia'] += float(min(pitch_std / 100, 0.3))
-                emotion_scores['ansia'] += float(min(pitch_std / 200, 0.2))
-            
+                scores[0] += min(pitch_std / 100, 0.3)  # gioia
+                scores[3] += min(pitch_std / 200, 0.2)  # ansia
+
             if tempo > 120:
-                emotion_scores['ansia'] += float(min((tempo - 120) / 100, 0.3))
-                emotion_scores['rabbia'] += float(min((tempo - 120) / 150, 0.2))
+                scores[3] += min((tempo - 120) / 100, 0.3)  # ansia
+                scores[2] += min((tempo - 120) / 150, 0.2)  # rabbia
             else:
-                emotion_scores['tristezza'] += float(min((120 - tempo) / 100, 0.3))
-            
+                scores[1] += min((120 - tempo) / 100, 0.3)  # tristezza
+
             # Normalize scores
-            total = sum(emotion_scores.values())
+            total = float(scores.sum())
             if total > 0:
-                emotion_scores = {k: float(v/total) for k, v in emotion_scores.items()}
+                scores /= total
             else:
-                emotion_scores = {k: 0.2 for k in emotion_scores}
-            
+                scores[:] = 0.2
+
+            dominant_emotion = self.LABELS[int(scores.argmax())]
+            emotion_scores = dict(zip(self.LABELS, (float(v) for v in scores)))
+
             # Get speech rate
             speech_rate = self._get_speech_rate(tempo)
             pitch_variability = self._get_pitch_variability(pitch_std)
@@ -85,7 +99,7 @@ class EmotionalAnalyzer:
             
             # Prepare results with explicit float conversions
             results = {
-                'dominant_emotion': max(emotion_scores.items(), key=lambda x: x[1])[0],
+                'dominant_emotion': dominant_emotion,
                 'emotion_probabilities': emotion_scores,
                 'speech_rate': speech_rate,
                 'pitch_variability': pitch_variability,
@@ -107,27 +121,15 @@ class EmotionalAnalyzer:
       
     def _get_speech_rate(self, tempo: float) -> str:
         """Determina la velocità del parlato in base al tempo"""
-        if tempo > 170:
-            return 'fast'
-        elif tempo < 130:
-            return 'slow'
-        return 'normal'
-        
+        return _RATE_LABELS[int(np.searchsorted(_RATE_EDGES, tempo))]
+
     def _get_pitch_variability(self, std: float) -> str:
         """Determina la variabilità del pitch in base alla deviazione standard"""
-        if std > 50:
-            return 'high'
-        elif std > 20:
-            return 'moderate'
-        return 'monotone'
-        
+        return _PITCH_LABELS[int(np.searchsorted(_PITCH_EDGES, std))]
+
     def _get_energy_level(self, energy: float) -> str:
         """Determina il livello di energia vocale"""
-        if energy > 0.1:
-            return 'high'
-        elif energy > 0.05:
-            return 'medium'
-        return 'low'
+        return _ENERGY_LABELS[int(np.searchsorted(_ENERGY_EDGES, energy))]
     
     def _get_default_results(self) -> Dict:
         """Risultati di default quando l'analisi non è possibile"""
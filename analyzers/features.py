@@ -0,0 +1,105 @@
+# analyzers/features.py
+import numpy as np
+import librosa
+from functools import lru_cache
+from typing import Dict
+
+
+@lru_cache(maxsize=4)
+def _hann_window(n_fft: int) -> np.ndarray:
+    """Finestra di Hann condivisa, costruita una volta per processo"""
+    return librosa.filters.get_window('hann', n_fft, fftbins=True).astype(np.float32)
+
+
+def compute_features(audio_data: np.ndarray, sr: int) -> Dict:
+    """Calcola una sola volta le feature condivise tra gli analizzatori.
+
+    La STFT domina il costo dell'analisi: calcolandola una volta e derivando
+    da essa RMS, onset envelope e piptrack si evita di ri-trasformare lo
+    stesso audio in ogni metodo di analisi.
+    """
+    # Assicurati che sia float32 mono e contiguo (somma pesata in float32,
+    # senza la promozione a float64 implicita di np.mean)
+    audio_data = np.ascontiguousarray(audio_data, dtype=np.float32)
+    if audio_data.ndim == 2:
+        audio_data = np.add(audio_data[:, 0], audio_data[:, 1], dtype=np.float32)
+        audio_data *= 0.5
+    elif audio_data.ndim > 2:
+        audio_data = audio_data.reshape(-1)
+
+    # Le feature vocali usate dagli analizzatori vivono sotto ~2 kHz:
+    # dimezzare il sample rate dimezza il costo di ogni FFT successiva.
+    # soxr_qq è la modalità soxr più veloce, sufficiente per feature statistiche.
+    if sr > 8000:
+        audio_data = librosa.resample(audio_data, orig_sr=sr, target_sr=8000,
+                                      res_type='soxr_qq')
+        sr = 8000
+
+    # Preprocessamento condiviso: normalizzazione di picco in-place
+    # (un passaggio per il massimo + una scalatura, nessun buffer nuovo
+    # né la gestione generica assi/soglie di librosa.util.normalize)
+    peak = float(np.abs(audio_data).max()) if audio_data.size else 0.0
+    if peak > 0:
+        np.multiply(audio_data, np.float32(1.0 / peak), out=audio_data)
+
+    # Rimozione silenzio da un'unica griglia RMS: gli stessi frame danno
+    # i confini del trim (30 dB sotto il picco, come librosa.effects.trim)
+    # e l'RMS riusato a valle dagli analizzatori
+    # Finestra corta specializzata per il parlato: con feature sotto i 2 kHz
+    # e pitch < 400 Hz, n_fft=1024 dà risoluzione più che sufficiente
+    # dimezzando memoria e calcolo della STFT rispetto al default 2048
+    n_fft = 1024
+    hop_length = 256
+    # Registrazioni più corte di un frame: il framing con center=False (rms
+    # e yin) solleva ParameterError, quindi si saltano trim e pitch e l'RMS
+    # viene derivato dallo spettrogramma (che con center=True riempie da sé)
+    sub_frame = len(audio_data) < n_fft
+    if not sub_frame:
+        rms = librosa.feature.rms(y=audio_data, frame_length=n_fft,
+                                  hop_length=hop_length, center=False)[0]
+        db = 20.0 * np.log10(rms + 1e-9)
+        above = db > db.max() - 30.0
+        first = int(np.argmax(above))
+        last = len(above) - int(np.argmax(above[::-1]))
+        audio_data = audio_data[first * hop_length:
+                                (last - 1) * hop_length + n_fft]
+        rms = rms[first:last]
+    # complex64 esplicito: magnitudine e potenza restano float32, metà
+    # del traffico di memoria rispetto a una promozione a float64
+    stft = librosa.stft(audio_data, n_fft=n_fft, hop_length=hop_length,
+                        window=_hann_window(n_fft), dtype=np.complex64)
+    # Spettrogramma di potenza senza il passaggio complesso->abs: la radice
+    # viene estratta una sola volta per la magnitudine, mentre i rapporti di
+    # energia (HNR) possono usare direttamente la potenza
+    S_power = stft.real * stft.real + stft.imag * stft.imag
+    S = np.sqrt(S_power)
+
+    # Feature derivate dalla magnitudine, senza ricalcolare la STFT
+    if sub_frame:
+        # frame_length esplicito: il default (2048) non combacia con i bin
+        # di uno spettrogramma a n_fft=1024 e solleva ParameterError
+        rms = librosa.feature.rms(S=S, frame_length=n_fft)[0]
+    onset_env = librosa.onset.onset_strength(
+        S=librosa.amplitude_to_db(S), sr=sr, hop_length=hop_length
+    )
+    if sub_frame:
+        # Nessun frame di pitch stimabile: traccia tutta non vocalizzata,
+        # che pitch_stats salta restituendo statistiche nulle
+        f0 = np.full(S.shape[1], np.nan, dtype=np.float32)
+    else:
+        # YIN restituisce direttamente un vettore f0 per frame: niente matrice
+        # piptrack (n_freq, n_frames) da mascherare e scartare quasi tutta
+        f0 = librosa.yin(audio_data, fmin=65, fmax=400, sr=sr,
+                         frame_length=n_fft, hop_length=hop_length).astype(np.float32)
+
+    return {
+        "audio": audio_data,
+        "sr": sr,
+        "n_fft": n_fft,
+        "hop_length": hop_length,
+        "S": S,
+        "S_power": S_power,
+        "rms": rms,
+        "onset_env": onset_env,
+        "f0": f0,
+    }
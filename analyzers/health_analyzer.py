@@ -1,167 +1,211 @@
-import numpy as np
-import librosa
-from typing import Dict
-from config.health_params import HEALTH_PARAMETERS, AGE_REFERENCE
-
-class HealthAnalyzer:
-    def __init__(self):
-        self.params = HEALTH_PARAMETERS
-        self.age_ref = AGE_REFERENCE
-        
-    def analyze_health(self, audio_data: np.ndarray, sr: int, age_group: str = 'adult') -> Dict:
-        """Analisi completa dello stato di salute vocale"""
-        # Preprocessamento audio
-        audio_data = self._preprocess_audio(audio_data, sr)
-        
-        # Analisi respirazione
-        breathing = self._analyze_breathing(audio_data, sr, age_group)
-        
-        # Analisi qualità vocale
-        voice_quality = self._analyze_voice_quality(audio_data, sr)
-        
-        # Analisi fatica
-        fatigue = self._analyze_fatigue(audio_data, sr)
-        
-        # Analisi ritmo del parlato
-        speech_rhythm = self._analyze_speech_rhythm(audio_data, sr)
-        
-        return {
-            "breathing": breathing,
-            "voice_quality": voice_quality,
-            "fatigue": fatigue,
-            "speech_rhythm": speech_rhythm
-        }
-
-    def _preprocess_audio(self, audio_data: np.ndarray, sr: int) -> np.ndarray:
-        """Preprocessa l'audio per l'analisi"""
-        # Normalizzazione
-        audio_data = librosa.util.normalize(audio_data)
-        
-        # Rimozione silenzio
-        audio_data, _ = librosa.effects.trim(audio_data, top_db=30)
-        
-        return audio_data
-
-    def _analyze_breathing(self, audio_data: np.ndarray, sr: int, age_group: str) -> Dict:
-        """Analisi dettagliata della respirazione"""
-        # Rileva eventi respiratori
-        onset_env = librosa.onset.onset_strength(y=audio_data, sr=sr)
-        breath_events = librosa.onset.onset_detect(
-            onset_envelope=onset_env,
-            sr=sr,
-            wait=sr//2
-        )
-        
-        # Calcola frequenza respiratoria
-        duration = len(audio_data) / sr
-        breaths_per_minute = (len(breath_events) * 60) / duration if duration > 0 else 0
-        
-        # Analizza regolarità respiratoria
-        if len(breath_events) > 1:
-            breath_intervals = np.diff(breath_events) / sr
-            breathing_regularity = 1 - (np.std(breath_intervals) / np.mean(breath_intervals)) if np.mean(breath_intervals) > 0 else 0
-        else:
-            breathing_regularity = 0
-        
-        return {
-            "rate": float(breaths_per_minute),
-            "regularity": float(breathing_regularity)
-        }
-
-    def _analyze_voice_quality(self, audio_data: np.ndarray, sr: int) -> Dict:
-        """Analisi della qualità vocale"""
-        # Calcola pitch e features correlate
-        pitches, magnitudes = librosa.piptrack(y=audio_data, sr=sr)
-        pitches_valid = pitches[magnitudes > np.max(magnitudes) * 0.1] if magnitudes.size > 0 else np.array([])
-        
-        # Jitter (variabilità del pitch)
-        if len(pitches_valid) > 1:
-            jitter = np.std(np.diff(pitches_valid)) / np.mean(pitches_valid) if np.mean(pitches_valid) > 0 else 0
-        else:
-            jitter = 0
-            
-        # Shimmer (variabilità dell'ampiezza)
-        rms = librosa.feature.rms(y=audio_data)[0]
-        shimmer = np.std(rms) / np.mean(rms) if np.mean(rms) > 0 else 0
-        
-        # Calcola HNR (Harmonic-to-Noise Ratio) in modo corretto
-        S = np.abs(librosa.stft(audio_data))
-        freqs = librosa.fft_frequencies(sr=sr)
-        freq_mask = freqs <= 2000
-        
-        # Calcola la media dell'energia per le bande armoniche e rumore
-        harmonic_energy = np.mean(S[freq_mask, :], axis=0)
-        noise_energy = np.mean(S[~freq_mask, :], axis=0)
-        
-        # Calcola HNR medio
-        hnr = np.mean(harmonic_energy) / np.mean(noise_energy) if np.mean(noise_energy) > 0 else 0
-        
-        # Calcolo strain vocale
-        strain = (jitter + shimmer) / 2
-        
-        # Quality score
-        quality_score = 1 - np.mean([jitter, shimmer, strain])
-        
-        return {
-            "quality_score": float(quality_score),
-            "hoarseness": float(1 - hnr if hnr < 1 else 0),
-            "strain": float(strain)
-        }
-
-    def _analyze_fatigue(self, audio_data: np.ndarray, sr: int) -> Dict:
-        """Analisi dei segni di fatica vocale"""
-        # Dividi audio in segmenti temporali
-        segment_duration = 3  # secondi
-        samples_per_segment = sr * segment_duration
-        segments = [audio_data[i:i + samples_per_segment] 
-                   for i in range(0, len(audio_data), samples_per_segment)
-                   if len(audio_data[i:i + samples_per_segment]) >= sr]
-        
-        if not segments:
-            return {
-                "fatigue_score": 0.0,
-                "timeline": [0.0]
-            }
-            
-        energy_trend = []
-        
-        for segment in segments:
-            rms = librosa.feature.rms(y=segment)[0]
-            energy_trend.append(float(np.mean(rms)))
-        
-        # Normalizza energy_trend
-        if energy_trend:
-            max_energy = max(energy_trend)
-            energy_trend = [e/max_energy if max_energy > 0 else 0 for e in energy_trend]
-            
-        # Calcola fatigue score
-        fatigue_score = 1 - (energy_trend[-1] / energy_trend[0]) if energy_trend and energy_trend[0] > 0 else 0
-        
-        return {
-            "fatigue_score": float(fatigue_score),
-            "timeline": energy_trend
-        }
-
-    def _analyze_speech_rhythm(self, audio_data: np.ndarray, sr: int) -> Dict:
-        """Analisi del ritmo del parlato"""
-        # Onset detection per il ritmo
-        onset_env = librosa.onset.onset_strength(y=audio_data, sr=sr)
-        tempo, beats = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr)
-        
-        # Calcola regolarità del ritmo
-        if len(beats) > 1:
-            beat_intervals = np.diff(beats)
-            rhythm_regularity = 1 - (np.std(beat_intervals) / np.mean(beat_intervals)) if np.mean(beat_intervals) > 0 else 0
-        else:
-            rhythm_regularity = 0
-            
-        # Calcola fluidità basata sulla regolarità degli onset
-        fluency = rhythm_regularity
-        
-        # Calcola stabilità come combinazione di tempo e regolarità
-        stability = (rhythm_regularity + (1 - abs(tempo - 120)/120)) / 2
-        
-        return {
-            "fluency": float(fluency),
-            "stability": float(stability)
-        }
\ No newline at end of file
+import numpy as np
+import librosa
+from functools import lru_cache
+from typing import Dict
+from config.health_params import HEALTH_PARAMETERS, AGE_REFERENCE
+from analyzers.features import compute_features
+from analyzers._kernels import pitch_stats
+
+
+@lru_cache(maxsize=4)
+def _harmonic_mask(sr: int, n_fft: int, hi: float = 2000.0) -> np.ndarray:
+    """Maschera dei bin armonici (<= hi Hz), calcolata una volta per processo"""
+    return librosa.fft_frequencies(sr=sr, n_fft=n_fft) <= hi
+
+
+class HealthAnalyzer:
+    def __init__(self):
+        self.params = HEALTH_PARAMETERS
+        self.age_ref = AGE_REFERENCE
+
+    def analyze_health(self, audio_data: np.ndarray, sr: int, age_group: str = 'adult',
+                       feats: Dict = None) -> Dict:
+        """Analisi completa dello stato di salute vocale"""
+        # Riusa le feature precalcolate se disponibili (una sola STFT condivisa)
+        if feats is None:
+            feats = compute_features(audio_data, sr)
+
+        # Audio troppo breve: evita le FFT, l'esito sarebbe comunque di default
+        if len(feats['audio']) < feats['sr']:
+            return self._get_default_results()
+
+        # Analisi respirazione
+        breathing = self._analyze_breathing(feats, age_group)
+
+        # Analisi qualità vocale
+        voice_quality = self._analyze_voice_quality(feats)
+
+        # Analisi fatica
+        fatigue = self._analyze_fatigue(feats)
+
+        # Analisi ritmo del parlato
+        speech_rhythm = self._analyze_speech_rhythm(feats)
+
+        return {
+            "breathing": breathing,
+            "voice_quality": voice_quality,
+            "fatigue": fatigue,
+            "speech_rhythm": speech_rhythm
+        }
+
+    def _get_default_results(self) -> Dict:
+        """Risultati di default quando l'analisi non è possibile"""
+        return {
+            "breathing": {"rate": 0.0, "regularity": 0.0},
+            "voice_quality": {"quality_score": 0.0, "hoarseness": 0.0, "strain": 0.0},
+            "fatigue": {"fatigue_score": 0.0, "timeline": [0.0]},
+            "speech_rhythm": {"fluency": 0.0, "stability": 0.0}
+        }
+
+    def _analyze_breathing(self, feats: Dict, age_group: str) -> Dict:
+        """Analisi dettagliata della respirazione"""
+        audio_data = feats['audio']
+        sr = feats['sr']
+
+        # Rileva eventi respiratori
+        onset_env = feats['onset_env']
+        breath_events = librosa.onset.onset_detect(
+            onset_envelope=onset_env,
+            sr=sr,
+            wait=sr//2
+        )
+
+        # Calcola frequenza respiratoria
+        duration = len(audio_data) / sr
+        breaths_per_minute = (len(breath_events) * 60) / duration if duration > 0 else 0
+
+        # Analizza regolarità respiratoria
+        if len(breath_events) > 1:
+            breath_intervals = np.diff(breath_events) / sr
+            breathing_regularity = 1 - (np.std(breath_intervals) / np.mean(breath_intervals)) if np.mean(breath_intervals) > 0 else 0
+        else:
+            breathing_regularity = 0
+
+        return {
+            "rate": float(breaths_per_minute),
+            "regularity": float(breathing_regularity)
+        }
+
+    def _analyze_voice_quality(self, feats: Dict) -> Dict:
+        """Analisi della qualità vocale"""
+        sr = feats['sr']
+
+        # Jitter (variabilità del pitch) dal kernel fuso sulla traccia YIN
+        _, _, jitter = pitch_stats(feats['f0'])
+
+        # Shimmer (variabilità dell'ampiezza)
+        rms = feats['rms']
+        shimmer = np.std(rms) / np.mean(rms) if np.mean(rms) > 0 else 0
+
+        # Calcola HNR (Harmonic-to-Noise Ratio) sulla potenza: il rapporto
+        # delle energie non richiede la radice quadrata della magnitudine
+        P = feats['S_power']
+        freq_mask = _harmonic_mask(sr, feats['n_fft'])
+
+        # Somma l'energia delle bande armoniche e rumore in due scalari:
+        # il rapporto delle medie non richiede i vettori per-frame intermedi
+        harmonic_sum = float(P[freq_mask].sum())
+        noise_sum = float(P[~freq_mask].sum())
+        harmonic_bins = int(freq_mask.sum())
+        noise_bins = len(freq_mask) - harmonic_bins
+
+        # Calcola HNR medio
+        if noise_sum > 0 and harmonic_bins > 0:
+            hnr = (harmonic_sum * noise_bins) / (noise_sum * harmonic_bins)
+        else:
+            hnr = 0
+
+        # Calcolo strain vocale
+        strain = (jitter + shimmer) / 2
+
+        # Quality score
+        quality_score = 1 - np.mean([jitter, shimmer, strain])
+
+        return {
+            "quality_score": float(quality_score),
+            "hoarseness": float(1 - hnr if hnr < 1 else 0),
+            "strain": float(strain)
+        }
+
+    def _analyze_fatigue(self, feats: Dict) -> Dict:
+        """Analisi dei segni di fatica vocale"""
+        audio_data = feats['audio']
+        sr = feats['sr']
+
+        # Un solo RMS con frame da 3 secondi invece di un loop Python
+        # che ri-chiama librosa.feature.rms per ogni segmento
+        segment_duration = 3  # secondi
+        samples_per_segment = sr * segment_duration
+
+        if len(audio_data) < sr:
+            return {
+                "fatigue_score": 0.0,
+                "timeline": [0.0]
+            }
+
+        n_full = len(audio_data) // samples_per_segment
+        if n_full == 0:
+            # Audio più corto di un segmento intero (rms solleva
+            # ParameterError se frame_length supera l'input): un unico
+            # frame parziale
+            rms = librosa.feature.rms(y=audio_data, frame_length=len(audio_data),
+                                      hop_length=len(audio_data), center=False)[0]
+        else:
+            rms = librosa.feature.rms(
+                y=audio_data,
+                frame_length=samples_per_segment,
+                hop_length=samples_per_segment,
+                center=False
+            )[0]
+            # Il framing strided scarta la coda parziale: aggiungila come
+            # segmento a sé se dura almeno un secondo, come faceva il
+            # vecchio loop per segmento
+            tail = audio_data[n_full * samples_per_segment:]
+            if len(tail) >= sr:
+                tail_rms = librosa.feature.rms(y=tail, frame_length=len(tail),
+                                               hop_length=len(tail), center=False)[0]
+                rms = np.concatenate([rms, tail_rms])
+
+        # Normalizza energy_trend
+        max_energy = float(rms.max())
+        if max_energy > 0:
+            energy_trend = (rms / max_energy).tolist()
+        else:
+            energy_trend = [0.0] * len(rms)
+
+        # Calcola fatigue score
+        fatigue_score = 1 - (energy_trend[-1] / energy_trend[0]) if energy_trend[0] > 0 else 0
+
+        return {
+            "fatigue_score": float(fatigue_score),
+            "timeline": energy_trend
+        }
+
+    def _analyze_speech_rhythm(self, feats: Dict) -> Dict:
+        """Analisi del ritmo del parlato"""
+        sr = feats['sr']
+
+        # Onset detection per il ritmo
+        onset_env = feats['onset_env']
+        # hop_length deve combaciare con quello dell'onset envelope
+        # condiviso, altrimenti il tempo viene letto a metà frame rate
+        tempo, beats = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr,
+                                               hop_length=feats['hop_length'])
+
+        # Calcola regolarità del ritmo
+        if len(beats) > 1:
+            beat_intervals = np.diff(beats)
+            rhythm_regularity = 1 - (np.std(beat_intervals) / np.mean(beat_intervals)) if np.mean(beat_intervals) > 0 else 0
+        else:
+            rhythm_regularity = 0
+
+        # Calcola fluidità basata sulla regolarità degli onset
+        fluency = rhythm_regularity
+
+        # Calcola stabilità come combinazione di tempo e regolarità
+        stability = (rhythm_regularity + (1 - abs(tempo - 120)/120)) / 2
+
+        return {
+            "fluency": float(fluency),
+            "stability": float(stability)
+        }
@@ -1,11 +1,14 @@
 import streamlit as st
 from audio_recorder_streamlit import audio_recorder
 import numpy as np
-from pydub import AudioSegment
+import soundfile as sf
 import io
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import blake2b
 from analyzers.emotional_analyzer import EmotionalAnalyzer
 from analyzers.health_analyzer import HealthAnalyzer
-from visualizers.results_visualizer import ResultsVisualizer
+from analyzers.features import compute_features
+from visualizers.results_visualizer import get_results_visualizer
 from config.emotional_params import REFERENCE_TEXTS
 import logging
 
@@ -13,41 +16,67 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@st.cache_resource
+def get_emotional_analyzer() -> EmotionalAnalyzer:
+    """Istanza condivisa tra i rerun di Streamlit"""
+    return EmotionalAnalyzer()
+
+@st.cache_resource
+def get_health_analyzer() -> HealthAnalyzer:
+    """Istanza condivisa tra i rerun di Streamlit"""
+    return HealthAnalyzer()
+
+@st.cache_resource
+def _warmup_librosa():
+    """Compila le kernel Numba di librosa una sola volta all'avvio.
+
+    La prima chiamata a rms/onset_strength paga secondi di compilazione JIT:
+    eseguirla qui su audio fittizio evita quel costo al primo click reale.
+    """
+    import librosa
+    librosa.feature.rms(y=np.zeros(2048, dtype=np.float32))
+    librosa.onset.onset_strength(y=np.zeros(4096, dtype=np.float32), sr=16000)
+    return True
+
+_warmup_librosa()
+
+# I wrapper cache_data sono indicizzati dal digest dei byte audio: i
+# parametri con underscore non vengono hashati da Streamlit, quindi i
+# rerun con la stessa registrazione sono istantanei.
+
+@st.cache_data(show_spinner=False)
+def cached_features(audio_hash: bytes, sr: int, _audio_data):
+    return compute_features(_audio_data, sr)
+
+@st.cache_data(show_spinner=False)
+def cached_emotional_analysis(audio_hash: bytes, sr: int, text_type, _audio_data, _feats):
+    return get_emotional_analyzer().analyze_emotions(
+        _audio_data, sr=sr, text_type=text_type, feats=_feats
+    )
+
+@st.cache_data(show_spinner=False)
+def cached_health_analysis(audio_hash: bytes, sr: int, age_group: str, _audio_data, _feats):
+    return get_health_analyzer().analyze_health(
+        _audio_data, sr=sr, age_group=age_group, feats=_feats
+    )
+
 def convert_audio_to_numpy(audio_bytes):
     """Convert audio bytes to numpy array with proper format"""
     try:
-        # Converti da bytes a AudioSegment
-        audio = AudioSegment.from_wav(io.BytesIO(audio_bytes))
-        
-        # Ottieni i parametri dell'audio
-        channels = audio.channels
-        sample_width = audio.sample_width
-        
-        # Converti in array numpy
-        samples = np.array(audio.get_array_of_samples())
-        
-        # Se stereo, prendi la media dei canali
-        if channels == 2:
-            samples = samples.reshape((-1, 2))
-            samples = np.mean(samples, axis=1)
-        
-        # Normalizza a float32 tra -1 e 1
-        if sample_width == 1:  # 8-bit
-            samples = samples / float(2**7)
-        elif sample_width == 2:  # 16-bit
-            samples = samples / float(2**15)
-        elif sample_width == 4:  # 32-bit
-            samples = samples / float(2**31)
-            
+        # libsndfile decodifica i PCM 8/16/24/32-bit direttamente in float32
+        samples, _ = sf.read(io.BytesIO(audio_bytes), dtype='float32', always_2d=False)
+
+        # Se stereo, prendi la media dei canali (somma pesata in float32,
+        # senza la promozione a float64 implicita di np.mean)
+        if samples.ndim == 2:
+            samples = np.add(samples[:, 0], samples[:, 1], dtype=np.float32)
+            samples *= 0.5
+
         # Assicurati che sia float32 mono
-        samples = samples.astype(np.float32)
-        
-        # Assicurati che sia un array 1D
-        if len(samples.shape) > 1:
-            samples = samples.flatten()
-            
+        samples = np.asarray(samples, dtype=np.float32)
+
         return samples
-        
+
     except Exception as e:
         logger.error(f"Error converting audio: {e}", exc_info=True)
         raise e
@@ -95,7 +124,13 @@ def main():
         
         try:
             audio_data = convert_audio_to_numpy(audio_bytes)
-            
+
+            # Il digest dei byte audio fa da chiave di cache per tutta l'analisi
+            audio_hash = blake2b(audio_bytes, digest_size=16).digest()
+
+            # Calcola le feature condivise una sola volta per entrambe le analisi
+            feats = cached_features(audio_hash, 16000, audio_data)
+
             st.markdown("### 📊 Analisi")
             col1, col2 = st.columns(2)
             
@@ -106,15 +141,16 @@ def main():
                             if len(audio_data) < 8000:  # Meno di 0.5 secondi a 16kHz
                                 st.warning("⚠️ La registrazione è troppo breve per un'analisi accurata")
                             
-                            emotional_analyzer = EmotionalAnalyzer()
-                            emotional_results = emotional_analyzer.analyze_emotions(
+                            emotional_results = cached_emotional_analysis(
+                                audio_hash,
+                                16000,
+                                selected_text if analysis_mode == "Lettura Brano di Riferimento" else None,
                                 audio_data,
-                                sr=16000,
-                                text_type=selected_text if analysis_mode == "Lettura Brano di Riferimento" else None
+                                feats
                             )
                             
                             if emotional_results:
-                                visualizer = ResultsVisualizer()
+                                visualizer = get_results_visualizer()
                                 visualizer.visualize_emotional_analysis(emotional_results)
                             else:
                                 st.error("Non sono riuscito ad analizzare le emozioni. Prova a registrare una frase più lunga.")
@@ -127,31 +163,55 @@ def main():
                 if st.button("🏥 Analisi Salute"):
                     try:
                         with st.spinner("Analizzo i parametri vocali..."):
-                            health_analyzer = HealthAnalyzer()
-                            # Crea un dict vuoto di base per i risultati
-                            base_results = {
-                                'breathing': {'rate': 0, 'regularity': 0},
-                                'voice_quality': {'quality_score': 0, 'hoarseness': 0, 'strain': 0},
-                                'fatigue': {'fatigue_score': 0, 'timeline': [0]},
-                                'speech_rhythm': {'fluency': 0}
-                            }
-                            
-                            # Esegui l'analisi
-                            health_results = health_analyzer.analyze_health(
+                            # Esegui l'analisi (l'analizzatore garantisce tutte
+                            # le chiavi, anche per audio troppo breve)
+                            health_results = cached_health_analysis(
+                                audio_hash,
+                                16000,
+                                age_group,
                                 audio_data,
-                                sr=16000,
-                                age_group=age_group
+                                feats
                             )
                             
-                            # Unisci i risultati base con quelli ottenuti
-                            health_results = {**base_results, **health_results}
-                            
-                            visualizer = ResultsVisualizer()
+                            visualizer = get_results_visualizer()
                             visualizer.visualize_health_analysis(health_results)
                     except Exception as e:
                         st.error(f"Errore durante l'analisi della salute: {str(e)}")
                         logger.error(f"Health analysis error: {e}", exc_info=True)
-                        
+
+            if st.button("🔄 Analisi Completa"):
+                try:
+                    with st.spinner("Eseguo entrambe le analisi..."):
+                        # librosa rilascia il GIL nei kernel C/Numba (FFT, rms,
+                        # onset): due thread danno parallelismo reale
+                        with ThreadPoolExecutor(max_workers=2) as executor:
+                            emotional_future = executor.submit(
+                                cached_emotional_analysis,
+                                audio_hash,
+                                16000,
+                                selected_text if analysis_mode == "Lettura Brano di Riferimento" else None,
+                                audio_data,
+                                feats
+                            )
+                            health_future = executor.submit(
+                                cached_health_analysis,
+                                audio_hash,
+                                16000,
+                                age_group,
+                                audio_data,
+                                feats
+                            )
+                            emotional_results = emotional_future.result()
+                            health_results = health_future.result()
+
+                        visualizer = get_results_visualizer()
+                        if emotional_results:
+                            visualizer.visualize_emotional_analysis(emotional_results)
+                        visualizer.visualize_health_analysis(health_results)
+                except Exception as e:
+                    st.error(f"Errore durante l'analisi completa: {str(e)}")
+                    logger.error(f"Full analysis error: {e}", exc_info=True)
+
         except Exception as e:
             st.error(f"Errore durante l'analisi dell'audio: {str(e)}")
             logger.error(f"Audio analysis error: {e}", exc_info=True)
@@ -1,73 +1,250 @@
 # visualizers/results_visualizer.py
+import io
+import math
 import streamlit as st
+import altair as alt
+import matplotlib
+matplotlib.use('Agg')  # backend headless, sicuro per i worker di Streamlit
 import matplotlib.pyplot as plt
+import pandas as pd
 import seaborn as sns
 import numpy as np
-from typing import Dict, List
+from types import MappingProxyType
+from typing import Dict, List, Tuple
+from matplotlib.figure import Figure
+
+
+# Costanti di modulo: allocate una volta all'import invece che per ogni
+# istanza o per ogni gauge disegnato
+
+_EMOTION_COLORS = {
+    "gioia": "#FFD700",
+    "tristezza": "#4169E1",
+    "rabbia": "#FF4500",
+    "ansia": "#9932CC",
+    "neutrale": "#90EE90",
+    "depressione": "#483D8B",
+    "eccitazione": "#FF69B4"
+}
+
+_HEALTH_COLORS = {
+    "healthy": "#90EE90",
+    "mild_concern": "#FFD700",
+    "moderate_concern": "#FFA500",
+    "severe_concern": "#FF4500"
+}
+
+# Soglie ordinate + palette allineata: il colore si sceglie con una
+# ricerca binaria C invece della catena if/elif
+_HEALTH_THRESHOLDS = np.array([0.4, 0.6, 0.8])
+_HEALTH_PALETTE = [
+    _HEALTH_COLORS['severe_concern'],
+    _HEALTH_COLORS['moderate_concern'],
+    _HEALTH_COLORS['mild_concern'],
+    _HEALTH_COLORS['healthy']
+]
+
+# Numero massimo di punti disegnati per la timeline della fatica: oltre,
+# marker='o' produce migliaia di cerchi che Agg rasterizza uno a uno
+_MAX_TIMELINE_PTS = 200
+
+# Etichette della heatmap dei parametri vitali
+_VITAL_LABELS = ('Respirazione', 'Qualità Vocale', 'Fatica', 'Stress Vocale', 'Ritmo')
+
+# Tabelle di interpretazione precompilate: i vecchi helper ricostruivano
+# questi dict a ogni chiamata per poi fare una sola .get()
+
+_SPEECH_RATE_I = MappingProxyType({
+    "slow": "riflessione o stanchezza",
+    "normal": "tranquillità e controllo",
+    "fast": "eccitazione o agitazione"
+})
+
+_PITCH_VARIABILITY_I = MappingProxyType({
+    "monotone": "possibile distacco emotivo o affaticamento",
+    "moderate": "un buon equilibrio emotivo",
+    "high": "forte coinvolgimento emotivo"
+})
+
+_VOICE_ENERGY_I = MappingProxyType({
+    "low": "indica possibile stanchezza o tristezza",
+    "medium": "mostra un livello di energia equilibrato",
+    "high": "suggerisce forte intensità emotiva"
+})
+
+_PAUSES_I = MappingProxyType({
+    "frequent": "mostra una tendenza a pause frequenti",
+    "normal": "presenta una distribuzione naturale delle pause",
+    "rare": "mostra poche pause, possibile segnale di ansia o urgenza"
+})
+
+# Interpretazioni numeriche della respirazione: bin via searchsorted
+_BREATH_RATE_EDGES = np.array([12.0, 20.0])
+_BREATH_RATE_I = ("sotto la norma, possibile bradipnea",
+                  "nella norma",
+                  "elevata, possibile tachipnea")
+_BREATH_REG_EDGES = np.array([0.2, 0.4])
+_BREATH_REG_I = ("respiro molto regolare",
+                 "respiro moderatamente regolare",
+                 "respiro irregolare")
+
+# Suggerimenti per emozione dominante: dati costanti, costruiti all'import
+_EMOTIONAL_SUGGESTIONS = {
+    "ansia": ["Prova esercizi di respirazione profonda per calmare l'ansia",
+            "Parla più lentamente e fai pause regolari",
+            "Concentrati su una cosa alla volta mentre parli"],
+
+    "tristezza": ["Cerca di mantenere un tono più vivace quando possibile",
+                "Fai piccole pause per recuperare energia",
+                "Concentrati su aspetti positivi durante il discorso"],
+
+    "rabbia": ["Fai pause più frequenti per mantenere il controllo",
+            "Cerca di moderare l'intensità della voce",
+            "Respira profondamente prima di parlare"],
+
+    "gioia": ["Mantieni questo ottimo stato emotivo",
+            "Usa questa energia positiva per coinvolgere gli altri",
+            "Ricorda di fare comunque pause regolari"],
+
+    "neutrale": ["Prova ad aggiungere più colore emotivo al tuo parlato",
+                "Varia il tono per mantenere l'attenzione",
+                "Usa la gestualità per enfatizzare il discorso"],
+
+    "depressione": ["Cerca di aumentare gradualmente l'energia vocale",
+                "Fai pause regolari per recuperare",
+                "Mantieni frasi brevi e concise"],
+
+    "eccitazione": ["Mantieni un ritmo controllato nel parlato",
+                "Fai pause regolari per organizzare il discorso",
+                "Modula l'intensità della voce quando necessario"]
+}
+
+
+# Costruttori di grafici memoizzati: costruzione matplotlib e
+# rasterizzazione Agg dominano il tempo di rerun di Streamlit, quindi ogni
+# blocco di disegno vive in una funzione st.cache_data indicizzata da tuple
+# hashabili dei soli valori che disegna e restituisce direttamente i byte
+# PNG: sui rerun con gli stessi dati st.image serve il PNG già pronto.
+
+def _fig_to_png(fig: Figure) -> bytes:
+    """Rasterizza la figura una sola volta e la sgancia dal registro pyplot"""
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png')
+    plt.close(fig)
+    return buf.getvalue()
+
+
+@st.cache_data(show_spinner=False)
+def _radar_png(values: Tuple, categories: Tuple) -> bytes:
+    """Radar chart dei parametri emotivi"""
+    fig, ax = plt.subplots(figsize=(10, 10), subplot_kw=dict(projection='polar'))
+
+    # Normalizza e chiudi il poligono in un colpo solo: buffer float32 di
+    # N+1 elementi riempito per slice e una sola divisione vettoriale (Agg
+    # converte comunque, i float Python boxati non servono a nulla)
+    closed = np.empty(len(values) + 1, dtype=np.float32)
+    closed[:-1] = values
+    closed[-1] = closed[0]
+    # Una divisione scalare + moltiplicazione vettoriale: evita la
+    # divisione elemento per elemento, più lenta sulla maggior parte
+    # delle microarchitetture
+    closed *= np.float32(1.0) / closed[:-1].max()
+    values = closed
+    # linspace con endpoint=True restituisce già l'array di angoli chiuso
+    angles = np.linspace(0, 2 * np.pi, len(categories) + 1)
+
+    ax.plot(angles, values)
+    ax.fill(angles, values, alpha=0.25)
+    ax.set_xticks(angles[:-1])
+    ax.set_xticklabels(categories)
+    return _fig_to_png(fig)
+
+
+@st.cache_data(show_spinner=False)
+def _build_emotion_bar_chart(names: Tuple, probs: Tuple, colors: Tuple) -> alt.Chart:
+    """Grafico a barre delle probabilità delle emozioni (spec Altair)
+
+    Altair spedisce al browser una piccola spec JSON renderizzata da Vega,
+    evitando la rasterizzazione Agg e la codifica PNG di matplotlib.
+    """
+    df = pd.DataFrame({
+        'emozione': list(names),
+        'probabilità': np.fromiter(probs, dtype=np.float32, count=len(probs))
+    })
+    return alt.Chart(df).mark_bar().encode(
+        x=alt.X('emozione', sort=list(names), title=None,
+                axis=alt.Axis(labelAngle=-45)),
+        y=alt.Y('probabilità', title='Probabilità'),
+        color=alt.Color('emozione', legend=None,
+                        scale=alt.Scale(domain=list(names), range=list(colors)))
+    )
+
+
+@st.cache_data(show_spinner=False)
+def _vitals_heatmap_png(values: Tuple, labels: Tuple) -> bytes:
+    """Heatmap dei parametri vitali"""
+    fig, ax = plt.subplots(figsize=(12, 4))
+    # Riga contigua float32 riempita per assegnazione diretta, senza la
+    # catena list -> array -> reshape (la cmap non richiede float64)
+    data = np.empty((1, len(values)), dtype=np.float32)
+    data[0] = values
+    sns.heatmap(data,
+            xticklabels=list(labels),
+            yticklabels=['Valori'],
+            cmap='RdYlGn',
+            center=0.5,
+            ax=ax)
+    return _fig_to_png(fig)
+
+
+@st.cache_data(show_spinner=False)
+def _fatigue_timeline_png(timeline: Tuple) -> bytes:
+    """Andamento della fatica nel tempo"""
+    fig, ax = plt.subplots(figsize=(10, 4))
+    ax.plot(timeline, marker='o')
+    ax.set_ylabel("Livello di Fatica")
+    ax.set_xlabel("Tempo (segmenti)")
+    return _fig_to_png(fig)
+
+
+
 
 class ResultsVisualizer:
     def __init__(self):
-        self.emotion_colors = {
-            "gioia": "#FFD700",
-            "tristezza": "#4169E1",
-            "rabbia": "#FF4500",
-            "ansia": "#9932CC",
-            "neutrale": "#90EE90",
-            "depressione": "#483D8B",
-            "eccitazione": "#FF69B4"
-        }
-        
-        self.health_colors = {
-            "healthy": "#90EE90",
-            "mild_concern": "#FFD700",
-            "moderate_concern": "#FFA500",
-            "severe_concern": "#FF4500"
-        }
+        self.emotion_colors = _EMOTION_COLORS
+        self.health_colors = _HEALTH_COLORS
+        self._health_thresholds = _HEALTH_THRESHOLDS
+        self._health_palette = _HEALTH_PALETTE
 
     def visualize_emotional_analysis(self, results: Dict):
         """Crea visualizzazioni per l'analisi emotiva"""
         st.subheader("📊 Analisi Emotiva")
-        
+
         # Radar chart dei parametri emotivi
-        fig, ax = plt.subplots(figsize=(10, 10), subplot_kw=dict(projection='polar'))
-        
-        # Prepara i dati per il radar chart
-        categories = ['Velocità', 'Variabilità Pitch', 'Energia', 'Pause', 'Ritmo']
-        values = [
+        categories = ('Velocità', 'Variabilità Pitch', 'Energia', 'Pause', 'Ritmo')
+        values = (
             results['speech_rate_value'],
             results['pitch_variability_value'],
             results['voice_energy_value'],
             results['speech_pauses_value'],
             results['rhythm_stability_value']
-        ]
-        
-        # Normalizza i valori
-        values = [v/max(values) for v in values]
-        angles = np.linspace(0, 2*np.pi, len(categories), endpoint=False)
-        values = np.concatenate((values, [values[0]]))  # Chiudi il poligono
-        angles = np.concatenate((angles, [angles[0]]))  # Chiudi il poligono
-        
-        ax.plot(angles, values)
-        ax.fill(angles, values, alpha=0.25)
-        ax.set_xticks(angles[:-1])
-        ax.set_xticklabels(categories)
-        st.pyplot(fig)
-        
+        )
+        st.image(_radar_png(values, categories))
+
         # Grafico a barre delle emozioni rilevate
         st.subheader("🎭 Distribuzione Emozioni")
+        # Un solo passaggio sul dict per materializzare nomi, valori e
+        # colori, invece di tre viste iterate separatamente
         emotions_data = results['emotion_probabilities']
-        
-        fig, ax = plt.subplots(figsize=(10, 6))
-        bars = ax.bar(emotions_data.keys(), emotions_data.values())
-        
-        # Colora le barre
-        for bar, emotion in zip(bars, emotions_data.keys()):
-            bar.set_color(self.emotion_colors.get(emotion, "#808080"))
-            
-        plt.xticks(rotation=45)
-        plt.ylabel("Probabilità")
-        st.pyplot(fig)
-        
+        names, probs, colors = [], [], []
+        for name, prob in emotions_data.items():
+            names.append(name)
+            probs.append(prob)
+            colors.append(self.emotion_colors.get(name, "#808080"))
+        st.altair_chart(
+            _build_emotion_bar_chart(tuple(names), tuple(probs), tuple(colors)),
+            use_container_width=True)
+
         # Report testuale
         st.subheader("📝 Interpretazione Emotiva")
         self._generate_emotional_report(results)
@@ -75,287 +252,192 @@ class ResultsVisualizer:
     def visualize_health_analysis(self, results: Dict):
         """Crea visualizzazioni per l'analisi della salute vocale"""
         st.subheader("🏥 Analisi della Salute Vocale")
+
+        # Un solo buffer contiguo per la timeline: alimenta il plot, il
+        # gauge dell'energia e il calcolo del trend senza ri-boxare la lista
+        timeline = np.asarray(results['fatigue'].get('timeline', []), dtype=np.float32)
         
         # Heatmap dei parametri vitali
-        vital_params = {
-            'Respirazione': results['breathing']['rate'],
-            'Qualità Vocale': results['voice_quality']['quality_score'],
-            'Fatica': results['fatigue']['fatigue_score'],
-            'Stress Vocale': results['voice_quality']['strain'],
-            'Ritmo': results['speech_rhythm']['fluency']
-        }
-        
-        # Convert to numpy array and reshape for heatmap
-        values = np.array(list(vital_params.values())).reshape(1, -1)
-        
-        fig, ax = plt.subplots(figsize=(12, 4))
-        sns.heatmap(values,
-                xticklabels=list(vital_params.keys()),
-                yticklabels=['Valori'],
-                cmap='RdYlGn',
-                center=0.5,
-                ax=ax)
-        st.pyplot(fig)
-        
-        # Timeline della fatica
+        vital_values = (
+            results['breathing']['rate'],
+            results['voice_quality']['quality_score'],
+            results['fatigue']['fatigue_score'],
+            results['voice_quality']['strain'],
+            results['speech_rhythm']['fluency']
+        )
+        st.image(_vitals_heatmap_png(vital_values, _VITAL_LABELS), use_column_width=True)
+
+        # Timeline della fatica (sottocampionata per il plot; le statistiche
+        # continuano a usare l'array completo)
         st.subheader("📉 Andamento Fatica nel Tempo")
-        fatigue_data = results['fatigue']['timeline']
-        fig, ax = plt.subplots(figsize=(10, 4))
-        ax.plot(fatigue_data, marker='o')
-        ax.set_ylabel("Livello di Fatica")
-        ax.set_xlabel("Tempo (segmenti)")
-        st.pyplot(fig)
+        if timeline.size > _MAX_TIMELINE_PTS:
+            idx = np.linspace(0, timeline.size - 1, _MAX_TIMELINE_PTS).astype(np.intp)
+            plotted = timeline[idx]
+        else:
+            plotted = timeline
+        st.image(_fatigue_timeline_png(tuple(plotted.tolist())), use_column_width=True)
         
-        # Indicatori di salute
-        cols = st.columns(4)
-        with cols[0]:
-            self._create_gauge_chart("Respirazione", 
-                                results['breathing']['rate'],
-                                min_val=10, max_val=30)
-        with cols[1]:
-            self._create_gauge_chart("Qualità Vocale", 
-                                results['voice_quality']['quality_score'],
-                                min_val=0, max_val=1)
-        with cols[2]:
-            self._create_gauge_chart("Stabilità", 
-                                results['speech_rhythm'].get('stability', 0.5),
-                                min_val=0, max_val=1)
-        with cols[3]:
-            # Usiamo l'ultimo valore della timeline come energy_level
-            energy_level = results['fatigue']['timeline'][-1] if results['fatigue']['timeline'] else 0.5
-            self._create_gauge_chart("Energia", 
-                                energy_level,
-                                min_val=0, max_val=1)
+        # Indicatori di salute: tutti i gauge su un'unica figura
+        # Usiamo l'ultimo valore della timeline come energy_level
+        energy_level = float(timeline[-1]) if timeline.size else 0.5
+        self._create_gauges_row([
+            ("Respirazione", results['breathing']['rate'], 10, 30),
+            ("Qualità Vocale", results['voice_quality']['quality_score'], 0, 1),
+            ("Stabilità", results['speech_rhythm'].get('stability', 0.5), 0, 1),
+            ("Energia", energy_level, 0, 1)
+        ])
         
         # Report testuale
         st.subheader("📋 Valutazione Clinica")
-        self._generate_health_report(results)
+        self._generate_health_report(results, timeline)
 
-    def _create_gauge_chart(self, title: str, value: float, min_val: float, max_val: float):
-        """Crea un grafico a gauge per indicatori di salute"""
-        normalized_value = (value - min_val) / (max_val - min_val)
-        color = self._get_health_color(normalized_value)
-        
-        fig = plt.figure(figsize=(4, 3))
-        ax = fig.add_subplot(111, projection='polar')
-        
-        # Crea l'arco del gauge
-        theta = np.linspace(0, np.pi, 100)
-        r = [1] * 100
-        ax.plot(theta, r, color='lightgray', lw=2)
-        
-        # Aggiungi il valore
-        theta_value = normalized_value * np.pi
-        ax.plot([0, theta_value], [0, 1], color=color, lw=3)
-        
-        ax.set_title(title)
-        ax.set_rticks([])
-        ax.set_xticks([])
-        st.pyplot(fig)
+    def _gauge_svg(self, title: str, normalized_value: float, color: str) -> str:
+        """Gauge come stringa SVG: qualche f-string al posto di una figura
+        matplotlib polare e della sua codifica PNG"""
+        angle = min(max(normalized_value, 0.0), 1.0) * math.pi
+        x2 = 50 + 40 * math.cos(math.pi - angle)
+        y2 = 50 - 40 * math.sin(math.pi - angle)
+        return (
+            f'<svg viewBox="0 0 100 60" width="160">'
+            f'<path d="M10 50 A40 40 0 0 1 90 50" stroke="lightgray" fill="none" stroke-width="4"/>'
+            f'<line x1="50" y1="50" x2="{x2:.2f}" y2="{y2:.2f}" stroke="{color}" stroke-width="4"/>'
+            f'<text x="50" y="58" text-anchor="middle" font-size="6">{title}</text>'
+            f'</svg>'
+        )
+
+    def _create_gauges_row(self, gauges: List[Tuple[str, float, float, float]]):
+        """Disegna tutti i gauge come SVG inline in un'unica riga"""
+        svgs = []
+        for title, value, min_val, max_val in gauges:
+            normalized_value = (value - min_val) / (max_val - min_val)
+            svgs.append(self._gauge_svg(title, normalized_value,
+                                        self._get_health_color(normalized_value)))
+        st.markdown(f'<div style="display:flex">{"".join(svgs)}</div>',
+                    unsafe_allow_html=True)
 
     def _get_health_color(self, value: float) -> str:
         """Determina il colore in base al valore di salute"""
-        if value >= 0.8:
-            return self.health_colors['healthy']
-        elif value >= 0.6:
-            return self.health_colors['mild_concern']
-        elif value >= 0.4:
-            return self.health_colors['moderate_concern']
-        else:
-            return self.health_colors['severe_concern']
-
-    def _interpret_breathing_rate(self, rate: float) -> str:
-        """Interpreta la frequenza respiratoria"""
-        if rate < 12:
-            return "sotto la norma, possibile bradipnea"
-        elif rate <= 20:
-            return "nella norma"
-        else:
-            return "elevata, possibile tachipnea"
-
-    def _interpret_breathing_regularity(self, irregularity: float) -> str:
-        """Interpreta la regolarità del respiro"""
-        if irregularity < 0.2:
-            return "respiro molto regolare"
-        elif irregularity < 0.4:
-            return "respiro moderatamente regolare"
-        else:
-            return "respiro irregolare"
-
-    def _interpret_voice_quality(self, quality: Dict) -> str:
-        """Interpreta la qualità vocale"""
-        quality_score = quality.get('quality_score', 0)
-        hoarseness = quality.get('hoarseness', 0)
-        strain = quality.get('strain', 0)
-        
-        issues = []
-        if quality_score < 0.5:
-            issues.append("qualità vocale compromessa")
-        if hoarseness > 0.3:
-            issues.append("presenza di raucedine")
-        if strain > 0.4:
-            issues.append("significativo sforzo vocale")
-            
-        if not issues:
-            return "Qualità vocale nella norma"
-        return f"Rilevate le seguenti problematiche: {', '.join(issues)}"
-
-    def _interpret_fatigue(self, fatigue: Dict) -> str:
-        """Interpreta i segni di fatica"""
-        fatigue_score = fatigue.get('fatigue_score', 0)
-        energy_trend = fatigue.get('timeline', [])
-        
-        if fatigue_score < 0.3:
-            base_msg = "Livello di fatica contenuto"
-        elif fatigue_score < 0.6:
-            base_msg = "Moderati segni di affaticamento"
-        else:
-            base_msg = "Significativi segni di affaticamento"
-            
-        if len(energy_trend) > 1:
-            trend_diff = energy_trend[-1] - energy_trend[0]
-            if trend_diff < -0.2:
-                trend_msg = ", con progressivo calo dell'energia"
-            elif trend_diff > 0.2:
-                trend_msg = ", con recupero di energia nel tempo"
-            else:
-                trend_msg = ", con livelli di energia stabili"
-        else:
-            trend_msg = ""
-            
-        return base_msg + trend_msg
-
-    def _interpret_pauses(self, pauses: str) -> str:
-        """Interpreta il pattern delle pause"""
-        interpretations = {
-            "frequent": "mostra una tendenza a pause frequenti",
-            "normal": "presenta una distribuzione naturale delle pause",
-            "rare": "mostra poche pause, possibile segnale di ansia o urgenza"
-        }
-        return interpretations.get(pauses, "presenta un pattern di pause non definito")
+        return self._health_palette[int(np.searchsorted(self._health_thresholds,
+                                                        value, side='right'))]
 
     def _generate_emotional_report(self, results: Dict):
         """Genera un report descrittivo dell'analisi emotiva"""
         dominant_emotion = results['dominant_emotion']
-        confidence = results['emotion_probabilities'][dominant_emotion]
-        
-        suggestions = self._generate_emotional_suggestions(results)
-        
-        report = [
-            f"**Emozione Dominante**: {dominant_emotion} (confidenza: {confidence:.1%})",
-            "\n**Analisi Dettagliata**:",
-            f"- La velocità del parlato è {results['speech_rate']}, "
-            f"indicando un possibile stato di {self._interpret_speech_rate(results['speech_rate'])}",
-            f"- La variabilità del pitch è {results['pitch_variability']}, "
-            f"suggerendo {self._interpret_pitch_variability(results['pitch_variability'])}",
-            f"- L'energia vocale {self._interpret_voice_energy(results['voice_energy'])}",
-            f"- Il pattern delle pause {self._interpret_pauses(results['speech_pauses'])}",
-            "\n**Suggerimenti**:",
-        ]
-        
-        # Aggiungiamo i suggerimenti solo se non sono None
-        if suggestions:
-            report.append(suggestions)
-        else:
-            report.append("- Mantieni un respiro regolare e un tono controllato")
-        
-        st.markdown("\n".join(report))
+        st.markdown(_emotional_report_md(
+            dominant_emotion,
+            float(results['emotion_probabilities'][dominant_emotion]),
+            results['speech_rate'],
+            results['pitch_variability'],
+            results['voice_energy'],
+            results['speech_pauses']
+        ))
 
-    def _generate_health_report(self, results: Dict):
+    def _generate_health_report(self, results: Dict, timeline: np.ndarray):
         """Genera un report descrittivo dell'analisi della salute"""
         breathing = results['breathing']
         voice_quality = results['voice_quality']
         fatigue = results['fatigue']
-        
-        report = [
-            "**Valutazione Respiratoria**:",
-            f"- Frequenza respiratoria: {breathing['rate']:.1f} respiri/min "
-            f"({self._interpret_breathing_rate(breathing['rate'])})",
-            f"- Regolarità: {self._interpret_breathing_regularity(breathing.get('irregularity', 0))}",
-            "\n**Qualità Vocale**:",
-            f"- {self._interpret_voice_quality(voice_quality)}",
-            "\n**Indicatori di Fatica**:",
-            f"- {self._interpret_fatigue(fatigue)}",
-            "\n**Raccomandazioni**:",
-            self._generate_health_recommendations(results)
-        ]
-        
-        st.markdown("\n".join(report))
+        trend_diff = float(timeline[-1] - timeline[0]) if timeline.size > 1 else None
+        st.markdown(_health_report_md(
+            float(breathing['rate']),
+            float(breathing.get('irregularity', 0)),
+            float(voice_quality.get('quality_score', 0)),
+            float(voice_quality.get('hoarseness', 0)),
+            float(voice_quality.get('strain', 0)),
+            float(fatigue.get('fatigue_score', 0)),
+            trend_diff
+        ))
 
-    def _generate_health_recommendations(self, results: Dict) -> str:
-        """Genera raccomandazioni per la salute vocale"""
-        recommendations = []
-        
-        if results['breathing']['rate'] > 20:
-            recommendations.append("- Pratica esercizi di respirazione diaframmatica")
-            
-        if results['voice_quality'].get('hoarseness', 0) > 0.3:
-            recommendations.append("- Riposa la voce e mantieni una buona idratazione")
-            
-        if results['fatigue'].get('fatigue_score', 0) > 0.3:
-            recommendations.append("- Considera di fare più pause durante il parlato")
-            
-        if not recommendations:
-            recommendations.append("- Mantieni le tue buone abitudini vocali")
-            
-        return "\n".join(recommendations)
-
-    def _interpret_speech_rate(self, rate: str) -> str:
-        """Interpreta la velocità del parlato"""
-        interpretations = {
-            "slow": "riflessione o stanchezza",
-            "normal": "tranquillità e controllo",
-            "fast": "eccitazione o agitazione"
-        }
-        return interpretations.get(rate, "stato non definito")
-
-    def _interpret_pitch_variability(self, var: str) -> str:
-        """Interpreta la variabilità del pitch"""
-        interpretations = {
-            "monotone": "possibile distacco emotivo o affaticamento",
-            "moderate": "un buon equilibrio emotivo",
-            "high": "forte coinvolgimento emotivo"
-        }
-        return interpretations.get(var, "variabilità non definita")
-
-    def _interpret_voice_energy(self, energy: str) -> str:
-        """Interpreta il livello di energia vocale"""
-        interpretations = {
-            "low": "indica possibile stanchezza o tristezza",
-            "medium": "mostra un livello di energia equilibrato",
-            "high": "suggerisce forte intensità emotiva"
-        }
-        return interpretations.get(energy, "energia non definita")
-
-    def _generate_emotional_suggestions(self, results: Dict) -> str:
-        """Genera suggerimenti basati sull'analisi emotiva"""
-        dominant_emotion = results['dominant_emotion']
-        suggestions = {
-            "ansia": ["Prova esercizi di respirazione profonda per calmare l'ansia",
-                    "Parla più lentamente e fai pause regolari",
-                    "Concentrati su una cosa alla volta mentre parli"],
-            
-            "tristezza": ["Cerca di mantenere un tono più vivace quando possibile",
-                        "Fai piccole pause per recuperare energia",
-                        "Concentrati su aspetti positivi durante il discorso"],
-            
-            "rabbia": ["Fai pause più frequenti per mantenere il controllo",
-                    "Cerca di moderare l'intensità della voce",
-                    "Respira profondamente prima di parlare"],
-            
-            "gioia": ["Mantieni questo ottimo stato emotivo",
-                    "Usa questa energia positiva per coinvolgere gli altri",
-                    "Ricorda di fare comunque pause regolari"],
-            
-            "neutrale": ["Prova ad aggiungere più colore emotivo al tuo parlato",
-                        "Varia il tono per mantenere l'attenzione",
-                        "Usa la gestualità per enfatizzare il discorso"],
-            
-            "depressione": ["Cerca di aumentare gradualmente l'energia vocale",
-                        "Fai pause regolari per recuperare",
-                        "Mantieni frasi brevi e concise"],
-            
-            "eccitazione": ["Mantieni un ritmo controllato nel parlato",
-                        "Fai pause regolari per organizzare il discorso",
-                        "Modula l'intensità della voce quando necessario"]
-        }    
\ No newline at end of file
+
+# I report sono funzioni pure degli scalari che stampano: memoizzarli con
+# st.cache_data evita di riassemblare il markdown a ogni rerun.
+
+@st.cache_data(show_spinner=False)
+def _emotional_report_md(dominant_emotion: str, confidence: float, speech_rate: str,
+                         pitch_variability: str, voice_energy: str,
+                         speech_pauses: str) -> str:
+    """Markdown del report emotivo"""
+    # Fallback se per l'emozione non esistono suggerimenti dedicati
+    suggestions = ("\n".join(f"- {s}" for s in _EMOTIONAL_SUGGESTIONS.get(dominant_emotion, []))
+                   or "- Mantieni un respiro regolare e un tono controllato")
+
+    return (
+        f"**Emozione Dominante**: {dominant_emotion} (confidenza: {confidence:.1%})\n"
+        "\n**Analisi Dettagliata**:\n"
+        f"- La velocità del parlato è {speech_rate}, "
+        f"indicando un possibile stato di {_SPEECH_RATE_I.get(speech_rate, 'stato non definito')}\n"
+        f"- La variabilità del pitch è {pitch_variability}, "
+        f"suggerendo {_PITCH_VARIABILITY_I.get(pitch_variability, 'variabilità non definita')}\n"
+        f"- L'energia vocale {_VOICE_ENERGY_I.get(voice_energy, 'energia non definita')}\n"
+        f"- Il pattern delle pause {_PAUSES_I.get(speech_pauses, 'presenta un pattern di pause non definito')}\n"
+        "\n**Suggerimenti**:\n"
+        f"{suggestions}"
+    )
+
+
+@st.cache_data(show_spinner=False)
+def _health_report_md(rate: float, irregularity: float, quality_score: float,
+                      hoarseness: float, strain: float, fatigue_score: float,
+                      trend_diff: float = None) -> str:
+    """Markdown del report di salute"""
+    # Qualità vocale
+    issues = []
+    if quality_score < 0.5:
+        issues.append("qualità vocale compromessa")
+    if hoarseness > 0.3:
+        issues.append("presenza di raucedine")
+    if strain > 0.4:
+        issues.append("significativo sforzo vocale")
+    quality_msg = (f"Rilevate le seguenti problematiche: {', '.join(issues)}"
+                   if issues else "Qualità vocale nella norma")
+
+    # Fatica
+    if fatigue_score < 0.3:
+        fatigue_msg = "Livello di fatica contenuto"
+    elif fatigue_score < 0.6:
+        fatigue_msg = "Moderati segni di affaticamento"
+    else:
+        fatigue_msg = "Significativi segni di affaticamento"
+
+    if trend_diff is not None:
+        if trend_diff < -0.2:
+            fatigue_msg += ", con progressivo calo dell'energia"
+        elif trend_diff > 0.2:
+            fatigue_msg += ", con recupero di energia nel tempo"
+        else:
+            fatigue_msg += ", con livelli di energia stabili"
+
+    # Raccomandazioni
+    recommendations = []
+    if rate > 20:
+        recommendations.append("- Pratica esercizi di respirazione diaframmatica")
+    if hoarseness > 0.3:
+        recommendations.append("- Riposa la voce e mantieni una buona idratazione")
+    if fatigue_score > 0.3:
+        recommendations.append("- Considera di fare più pause durante il parlato")
+    if not recommendations:
+        recommendations.append("- Mantieni le tue buone abitudini vocali")
+
+    return (
+        "**Valutazione Respiratoria**:\n"
+        f"- Frequenza respiratoria: {rate:.1f} respiri/min "
+        f"({_BREATH_RATE_I[int(np.searchsorted(_BREATH_RATE_EDGES, rate, side='right'))]})\n"
+        f"- Regolarità: {_BREATH_REG_I[int(np.searchsorted(_BREATH_REG_EDGES, irregularity, side='right'))]}\n"
+        "\n**Qualità Vocale**:\n"
+        f"- {quality_msg}\n"
+        "\n**Indicatori di Fatica**:\n"
+        f"- {fatigue_msg}\n"
+        "\n**Raccomandazioni**:\n"
+        + "\n".join(recommendations)
+    )
+
+
+@st.cache_resource
+def get_results_visualizer() -> ResultsVisualizer:
+    """Singleton che sopravvive ai rerun di Streamlit.
+
+    cache_resource (e non cache_data) perché l'istanza è un oggetto a vita
+    lunga condiviso da tutti i chiamanti: la semantica per copia di
+    cache_data ne creerebbe una copia a ogni chiamata.
+    """
+    return ResultsVisualizer()
\ No newline at end of file